@@ -4,19 +4,285 @@ A comprehensive system for managing mathematical lemmas, theorems, and proofs
 with persistence, advanced search, and multiple export formats.
 """
 
+import atexit
+import io
 import json
 import os
+import weakref
 from datetime import datetime
 from typing import List, Dict, Optional, Set, Any
 import re
+from collections import Counter, OrderedDict
+from itertools import count
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+# Utilities whose log may still need compacting when the interpreter exits
+_open_utilities = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_utilities() -> None:
+    """Close every utility still open, so one-shot scripts leave a snapshot."""
+    for clu in list(_open_utilities):
+        clu.close()
+
+
+# Word tokens used by the search index
+_WORD_RE = re.compile(r"\w+")
+# Characters re's Unicode \s matches; RE2's own \s is ASCII-only
+_RE2_SPACE = r"\t\n\v\f\r\x{1c}-\x{1f}\x{85}\p{Z}"
+# RE2 spellings of re's shorthand classes, used outside and inside [...];
+# None means the class has no spelling there. The (?-i:...) keeps case
+# folding from adding marks such as U+0345 to the letter classes.
+_RE2_CLASSES = {
+    'd': (r"(?-i:\p{Nd})", r"\p{Nd}"),
+    'D': (r"(?-i:\P{Nd})", r"\P{Nd}"),
+    'w': (r"(?-i:[\p{L}\p{N}_])", None),
+    'W': (r"(?-i:[^\p{L}\p{N}_])", None),
+    's': (f"(?-i:[{_RE2_SPACE}])", _RE2_SPACE),
+    'S': (f"(?-i:[^{_RE2_SPACE}])", None),
+}
+# A trailing $ (only closing parentheses after it), which search() can
+# treat as consuming an optional final newline
+_RE2_TAIL = re.compile(r"\)*\Z")
+
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON, using orjson when it is installed.
+    
+    Output is compact unless indent is set, which is meant for exports.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def _trigrams(token: str) -> Set[str]:
+    """Return the three-character substrings of a word."""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _re2_translate(query: str) -> Optional[str]:
+    """
+    Rewrite a re pattern so that RE2 finds the same matches.
+    
+    \\d, \\w and \\s become Unicode property classes, a trailing $ becomes
+    \\n?\\z and \\Z becomes \\z. Only whether a match exists is preserved,
+    which is all search() needs.
+    
+    Returns:
+        The RE2 pattern, or None if the pattern uses something without an
+        RE2 equivalent (\\b, \\B, POSIX [:classes:], inline flags other
+        than i and s, lookaround)
+    """
+    parts = []
+    depth = 0
+    in_class = False
+    class_start = 0
+    i = 0
+    while i < len(query):
+        char = query[i]
+        if char == '\\':
+            escaped = query[i + 1:i + 2]
+            if escaped in _RE2_CLASSES:
+                spelling = _RE2_CLASSES[escaped][in_class]
+                if spelling is None:
+                    return None
+                parts.append(spelling)
+            elif escaped in ('b', 'B'):
+                return None
+            elif escaped == 'Z' and not in_class:
+                parts.append(r"\z")
+            else:
+                parts.append(query[i:i + 2])
+            i += 2
+            continue
+        
+        if in_class:
+            if char == '[' and query.startswith('[:', i):
+                return None
+            if char == ']' and i > class_start:
+                in_class = False
+        elif char == '[':
+            if query.startswith('[:', i + 1):
+                return None
+            in_class = True
+            # A ] right after [ or [^ is a literal
+            class_start = i + (2 if query.startswith('^', i + 1) else 1)
+        elif char == '(':
+            depth += 1
+            if query.startswith('?', i + 1):
+                flags = re.match(r"[a-zA-Z-]*", query[i + 2:]).group()
+                if not (query.startswith((':', 'P<'), i + 2)
+                        or flags and set(flags) <= set('is')):
+                    return None
+        elif char == ')':
+            depth -= 1
+        elif char == '$':
+            rest = query[i + 1:]
+            if not (_RE2_TAIL.match(rest)
+                    or depth == 0 and rest.startswith('|')):
+                return None
+            char = r"\n?\z"
+        elif char == '{' and re.match(r"\{,\d+\}", query[i:]):
+            # re reads {,n} as {0,n}; RE2 would read it literally
+            char = '{0'
+        parts.append(char)
+        i += 1
+    return ''.join(parts)
+
+
+def _compile_query(query: str) -> Optional[Any]:
+    """
+    Compile a case-insensitive search pattern.
+    
+    RE2 is used when installed, since it runs in linear time on any input.
+    The re module decides which patterns are valid, and _re2_translate()
+    rewrites the ones RE2 would read differently. Patterns it cannot
+    rewrite, and patterns RE2 does not support (backreferences,
+    lookaround), run on the re module instead.
+    
+    Returns:
+        Compiled pattern, or None if the pattern is invalid
+    """
+    try:
+        pattern = re.compile(query, re.IGNORECASE)
+    except re.error:
+        return None
+    translated = _re2_translate(query) if re2 is not None else None
+    if translated is not None:
+        options = re2.Options()
+        options.case_sensitive = False
+        options.log_errors = False
+        try:
+            return re2.compile(translated, options)
+        except re2.error:
+            pass
+    return pattern
+
+
+class Lemma(Mapping):
+    """
+    A single lemma record.
+    
+    Fields are stored in slots instead of a per-lemma dict. Lemmas can also
+    be read by key (lemma['statement']) like a dictionary, but not assigned:
+    changes go through CodedLemmaUtility so its indexes stay in step.
+    
+    The dependencies attribute is a dict used as an insertion-ordered set
+    (values are None); lemma['dependencies'] and to_dict() return it as a
+    list.
+    """
+    
+    FIELDS = ('statement', 'proof', 'tags', 'category', 'notes',
+              'dependencies', 'created', 'modified')
+    # _lc_text caches search_text() and is never serialized
+    __slots__ = FIELDS + ('_lc_text',)
+    
+    def __init__(self, statement: str, proof: str = '',
+                 tags: Optional[List[str]] = None, category: str = 'general',
+                 notes: str = '', dependencies: Optional[List[str]] = None,
+                 created: str = '', modified: str = ''):
+        self.statement = statement
+        self.proof = proof
+        self.tags = list(tags or ())
+        self.category = category
+        self.notes = notes
+        self.dependencies = dict.fromkeys(dependencies or ())
+        self.created = created
+        self.modified = modified
+        self._lc_text = None
+    
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        if field == 'dependencies':
+            return list(self.dependencies)
+        return getattr(self, field)
+    
+    def __iter__(self):
+        return iter(self.FIELDS)
+    
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+    
+    def __repr__(self) -> str:
+        return f"Lemma({self.to_dict()!r})"
+    
+    def search_text(self) -> str:
+        """
+        Return the statement, proof and notes lowercased and joined by
+        newlines. The result is cached; changing a text field must reset
+        _lc_text.
+        """
+        if self._lc_text is None:
+            self._lc_text = (f"{self.statement or ''}\n{self.proof or ''}\n"
+                             f"{self.notes or ''}").lower()
+        return self._lc_text
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the lemma as a plain dictionary that shares no lists."""
+        data = {field: self[field] for field in self.FIELDS}
+        data['tags'] = list(self.tags)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Lemma':
+        """
+        Build a lemma from a dictionary, ignoring unknown keys. A missing
+        statement defaults to an empty string.
+        """
+        fields = {field: data[field] for field in cls.FIELDS if field in data}
+        fields.setdefault('statement', '')
+        return cls(**fields)
 
 
 class CodedLemmaUtility:
     """
     Main class for the Codified Lemma Utility.
     Manages lemmas with persistence, search, and export capabilities.
+    
+    Mutations are appended to a JSON-Lines log next to the data file and
+    folded back into the data file by compact(). Utilities still open when
+    the interpreter exits are closed, which compacts them.
     """
     
+    # Number of logged mutations after which save() compacts the log
+    LOG_COMPACT_THRESHOLD = 1000
+    # Number of dependency chains kept by get_dependency_chain()
+    CHAIN_CACHE_SIZE = 256
+    # Data files at least this large are stream-parsed when ijson is installed
+    STREAM_LOAD_THRESHOLD = 4 * 1024 * 1024
+    # Buffer size for reading and writing the data file
+    IO_BUFFER_SIZE = 1 << 20
+    
     def __init__(self, data_file: str = "lemmas.json"):
         """
         Initialize the utility.
@@ -24,15 +290,46 @@ class CodedLemmaUtility:
         Args:
             data_file: Path to the JSON file for persistence
         """
+        now = datetime.now().isoformat()
         self.data_file = data_file
+        self.log_file = data_file + '.log'
         self.lemmas = {}
         self.code_counter = 1000
         self.metadata = {
-            'created': datetime.now().isoformat(),
-            'last_modified': datetime.now().isoformat(),
+            'created': now,
+            'last_modified': now,
             'version': '1.0.0'
         }
+        self._dirty = False
+        self._autosave = True
+        self._batches = []
+        self._log = None
+        self._log_records = 0
+        self._inverted = {}
+        self._tag_index = {}
+        self._category_index = {}
+        self._grams = {}
+        self._position = {}
+        self._positions = count()
+        self._dependents = {}
+        self._chain_cache = OrderedDict()
+        self._category_counts = Counter()
+        self._tag_counts = Counter()
+        self._proved = set()
         self.load()
+        _open_utilities.add(self)
+
+    def __enter__(self):
+        """Batch mutations: defer saving until the outermost block exits."""
+        self._batches.append(self._autosave)
+        self._autosave = False
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._autosave = self._batches.pop()
+        if self._autosave:
+            self.flush()
+        return False
     
     def add_lemma(self, statement: str, proof: Optional[str] = None, 
                   tags: Optional[List[str]] = None, 
@@ -51,27 +348,60 @@ class CodedLemmaUtility:
         Returns:
             The assigned code for the lemma
         """
+        now = datetime.now().isoformat()
         code = f"L{self.code_counter}"
         self.code_counter += 1
         
-        self.lemmas[code] = {
-            'statement': statement,
-            'proof': proof or '',
-            'tags': tags or [],
-            'category': category or 'general',
-            'notes': notes or '',
-            'dependencies': [],
-            'created': datetime.now().isoformat(),
-            'modified': datetime.now().isoformat()
-        }
+        self.lemmas[code] = Lemma(
+            statement,
+            proof=proof or '',
+            tags=tags or [],
+            category=category or 'general',
+            notes=notes or '',
+            created=now,
+            modified=now
+        )
         
-        self.metadata['last_modified'] = datetime.now().isoformat()
-        self.save()
+        self.metadata['last_modified'] = now
+        self._position[code] = next(self._positions)
+        self._index_lemma(code, self.lemmas[code], 1)
+        self._count_lemma(self.lemmas[code], 1)
+        if proof:
+            self._proved.add(code)
+        self._append_log({
+            'op': 'add',
+            'code': code,
+            'lemma': self.lemmas[code].to_dict(),
+            'code_counter': self.code_counter,
+            'last_modified': self.metadata['last_modified']
+        })
+        self._mark_dirty()
         return code
     
+    def bulk_add(self, lemmas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add several lemmas and save once at the end.
+        
+        Args:
+            lemmas: Dictionaries of add_lemma keyword arguments
+            
+        Returns:
+            The assigned codes, in input order
+        """
+        autosave = self._autosave
+        self._autosave = False
+        try:
+            codes = [self.add_lemma(**lemma) for lemma in lemmas]
+        finally:
+            self._autosave = autosave
+            if autosave:
+                self.flush()
+        return codes
+    
     def get_lemma(self, code: str) -> Optional[Dict[str, Any]]:
-        """Retrieve a lemma by its code."""
-        return self.lemmas.get(code)
+        """Retrieve a copy of a lemma by its code."""
+        lemma = self.lemmas.get(code)
+        return lemma.to_dict() if lemma is not None else None
     
     def update_lemma(self, code: str, **kwargs) -> bool:
         """
@@ -82,19 +412,48 @@ class CodedLemmaUtility:
             **kwargs: Fields to update (statement, proof, tags, category, notes)
             
         Returns:
-            True if successful, False otherwise
+            True if successful, False if the lemma does not exist or a tag or
+            category value cannot be indexed
         """
         if code not in self.lemmas:
             return False
         
         allowed_fields = ['statement', 'proof', 'tags', 'category', 'notes']
-        for field, value in kwargs.items():
-            if field in allowed_fields:
-                self.lemmas[code][field] = value
+        changes = {field: value for field, value in kwargs.items()
+                   if field in allowed_fields}
+        # Normalize and check the values before the lemma leaves the
+        # indexes, so a bad value cannot leave the update half applied
+        try:
+            if 'tags' in changes:
+                changes['tags'] = list(changes['tags'] or [])
+                hash(tuple(changes['tags']))
+            hash(changes.get('category'))
+        except TypeError:
+            return False
         
-        self.lemmas[code]['modified'] = datetime.now().isoformat()
-        self.metadata['last_modified'] = datetime.now().isoformat()
-        self.save()
+        self._index_lemma(code, self.lemmas[code], -1)
+        self._count_lemma(self.lemmas[code], -1)
+        for field, value in changes.items():
+            setattr(self.lemmas[code], field, value)
+        self.lemmas[code]._lc_text = None
+        self._index_lemma(code, self.lemmas[code], 1)
+        self._count_lemma(self.lemmas[code], 1)
+        if self.lemmas[code].proof:
+            self._proved.add(code)
+        else:
+            self._proved.discard(code)
+        
+        now = datetime.now().isoformat()
+        self.lemmas[code].modified = now
+        self.metadata['last_modified'] = now
+        changes['modified'] = now
+        self._append_log({
+            'op': 'update',
+            'code': code,
+            'fields': changes,
+            'last_modified': self.metadata['last_modified']
+        })
+        self._mark_dirty()
         return True
     
     def delete_lemma(self, code: str) -> bool:
@@ -111,13 +470,25 @@ class CodedLemmaUtility:
             return False
         
         # Remove dependencies from other lemmas
-        for lemma_code, lemma_data in self.lemmas.items():
-            if code in lemma_data['dependencies']:
-                lemma_data['dependencies'].remove(code)
+        for lemma_code in self._dependents.pop(code, ()):
+            if lemma_code in self.lemmas:
+                del self.lemmas[lemma_code].dependencies[code]
+        for dep in self.lemmas[code].dependencies:
+            self._dependents.get(dep, set()).discard(code)
+        self._chain_cache.clear()
+        self._index_lemma(code, self.lemmas[code], -1)
+        self._count_lemma(self.lemmas[code], -1)
+        self._proved.discard(code)
+        del self._position[code]
         
         del self.lemmas[code]
         self.metadata['last_modified'] = datetime.now().isoformat()
-        self.save()
+        self._append_log({
+            'op': 'delete',
+            'code': code,
+            'last_modified': self.metadata['last_modified']
+        })
+        self._mark_dirty()
         return True
     
     def add_dependency(self, code: str, depends_on: str) -> bool:
@@ -132,18 +503,34 @@ class CodedLemmaUtility:
             True if successful, False otherwise
         """
         if code in self.lemmas and depends_on in self.lemmas:
-            if depends_on not in self.lemmas[code]['dependencies']:
-                self.lemmas[code]['dependencies'].append(depends_on)
-                self.lemmas[code]['modified'] = datetime.now().isoformat()
-                self.save()
+            if depends_on not in self.lemmas[code].dependencies:
+                self.lemmas[code].dependencies[depends_on] = None
+                self._dependents.setdefault(depends_on, set()).add(code)
+                self._chain_cache.clear()
+                now = datetime.now().isoformat()
+                self.lemmas[code].modified = now
+                self._append_log({
+                    'op': 'add_dependency',
+                    'code': code,
+                    'depends_on': depends_on,
+                    'modified': now
+                })
+                self._mark_dirty()
             return True
         return False
     
     def remove_dependency(self, code: str, depends_on: str) -> bool:
         """Remove a dependency relationship."""
-        if code in self.lemmas and depends_on in self.lemmas[code]['dependencies']:
-            self.lemmas[code]['dependencies'].remove(depends_on)
-            self.save()
+        if code in self.lemmas and depends_on in self.lemmas[code].dependencies:
+            del self.lemmas[code].dependencies[depends_on]
+            self._dependents[depends_on].discard(code)
+            self._chain_cache.clear()
+            self._append_log({
+                'op': 'remove_dependency',
+                'code': code,
+                'depends_on': depends_on
+            })
+            self._mark_dirty()
             return True
         return False
     
@@ -163,49 +550,164 @@ class CodedLemmaUtility:
             regex: Use regex for query matching
             
         Returns:
-            Dictionary of matching lemmas
+            Dictionary of copies of the matching lemmas
         """
         results = {}
+        lowered_query = query.lower() if query else ''
+        required_tags = set(tags) if tags else None
         
-        for code, lemma in self.lemmas.items():
+        pattern = None
+        if query and regex:
+            # An invalid regex skips this filter
+            pattern = _compile_query(query)
+        
+        candidates = self._candidates(query, tags, category, has_proof, regex)
+        if candidates is None:
+            codes = self.lemmas
+        else:
+            codes = sorted(candidates, key=self._position.__getitem__)
+        
+        for code in codes:
+            lemma = self.lemmas[code]
+            
             # Check category
-            if category and lemma['category'] != category:
+            if category and lemma.category != category:
                 continue
             
             # Check proof existence
             if has_proof is not None:
-                has_lemma_proof = bool(lemma['proof'])
-                if has_lemma_proof != has_proof:
+                if (code in self._proved) != has_proof:
                     continue
             
             # Check tags (must have all specified tags)
-            if tags:
-                if not all(tag in lemma['tags'] for tag in tags):
+            if required_tags:
+                if not required_tags.issubset(lemma.tags):
                     continue
             
             # Check query text
             if query:
-                search_text = f"{lemma['statement']} {lemma['proof']} {lemma.get('notes', '')}"
-                
                 if regex:
-                    try:
-                        if not re.search(query, search_text, re.IGNORECASE):
-                            continue
-                    except re.error:
-                        # Invalid regex, skip this filter
-                        pass
+                    search_text = f"{lemma.statement} {lemma.proof} {lemma.notes}"
+                    if pattern and not pattern.search(search_text):
+                        continue
                 else:
-                    if query.lower() not in search_text.lower():
+                    if lowered_query not in lemma.search_text():
                         continue
             
-            results[code] = lemma
+            results[code] = lemma.to_dict()
         
         return results
     
+    def _candidates(self, query: Optional[str], tags: Optional[List[str]],
+                    category: Optional[str], has_proof: Optional[bool],
+                    regex: bool) -> Optional[Set[str]]:
+        """
+        Narrow a search to the lemmas the index says can match.
+        
+        Returns:
+            Set of candidate codes, or None if the search cannot be narrowed
+        """
+        candidates = None
+        if category:
+            candidates = set(self._category_index.get(category, ()))
+        
+        for tag in tags or []:
+            codes = self._tag_index.get(tag, set())
+            candidates = set(codes) if candidates is None else candidates & codes
+        
+        if has_proof:
+            candidates = (set(self._proved) if candidates is None
+                          else candidates & self._proved)
+        
+        if query and not regex:
+            lowered = query.lower()
+            for match in _WORD_RE.finditer(lowered):
+                if candidates is not None and not candidates:
+                    break
+                codes = self._word_postings(match.group(),
+                                            match.start() > 0,
+                                            match.end() < len(lowered))
+                if codes is not None:
+                    candidates = (set(codes) if candidates is None
+                                  else candidates & codes)
+        
+        return candidates
+    
+    def _word_postings(self, word: str, starts: bool,
+                       ends: bool) -> Optional[Set[str]]:
+        """
+        Find the lemmas whose text can hold one word of a query.
+        
+        Args:
+            word: A lowercased word of the query
+            starts: The word is preceded by a non-word character
+            ends: The word is followed by a non-word character
+            
+        Returns:
+            Set of codes, or None if the word is too short to look up
+        """
+        if starts and ends:
+            # Delimited on both sides, so it is a whole indexed word
+            return self._inverted.get(word, set())
+        if len(word) < 3:
+            return None
+        
+        tokens = None
+        for gram in _trigrams(word):
+            found = self._grams.get(gram, set())
+            tokens = set(found) if tokens is None else tokens & found
+            if not tokens:
+                return set()
+        
+        codes = set()
+        for token in tokens:
+            if ((token.startswith(word) if starts else
+                 token.endswith(word) if ends else word in token)):
+                codes |= self._inverted[token]
+        return codes
+    
+    def _index_lemma(self, code: str, lemma: Lemma, delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) a lemma in the indexes."""
+        keys = [(self._category_index, lemma.category)]
+        keys.extend((self._tag_index, tag) for tag in lemma.tags)
+        keys.extend((self._inverted, token) for token
+                    in set(_WORD_RE.findall(lemma.search_text())))
+        for index, key in keys:
+            if delta > 0:
+                codes = index.get(key)
+                if codes is None:
+                    codes = index[key] = set()
+                    if index is self._inverted:
+                        for gram in _trigrams(key):
+                            self._grams.setdefault(gram, set()).add(key)
+                codes.add(code)
+            else:
+                codes = index.get(key, set())
+                codes.discard(code)
+                if not codes and key in index:
+                    del index[key]
+                    if index is self._inverted:
+                        for gram in _trigrams(key):
+                            tokens = self._grams[gram]
+                            tokens.discard(key)
+                            if not tokens:
+                                del self._grams[gram]
+    
+    def _rebuild_index(self) -> None:
+        """Rebuild the word, tag and category indexes."""
+        self._inverted = {}
+        self._tag_index = {}
+        self._category_index = {}
+        self._grams = {}
+        self._position = {}
+        self._positions = count()
+        for code, lemma in self.lemmas.items():
+            self._position[code] = next(self._positions)
+            self._index_lemma(code, lemma, 1)
+    
     def search_by_tag(self, tag: str) -> Dict[str, Dict[str, Any]]:
         """Find all lemmas with a specific tag."""
-        return {code: lemma for code, lemma in self.lemmas.items() 
-                if tag in lemma['tags']}
+        return self.search(tags=[tag])
     
     def get_dependency_chain(self, code: str) -> List[str]:
         """
@@ -220,6 +722,11 @@ class CodedLemmaUtility:
         if code not in self.lemmas:
             return []
         
+        cached = self._chain_cache.get(code)
+        if cached is not None:
+            self._chain_cache.move_to_end(code)
+            return list(cached)
+        
         chain = set()
         to_process = [code]
         
@@ -228,10 +735,19 @@ class CodedLemmaUtility:
             if current in chain:
                 continue
             chain.add(current)
-            to_process.extend(self.lemmas[current]['dependencies'])
+            # A cached chain already holds everything reachable from current
+            if current in self._chain_cache:
+                chain.update(self._chain_cache[current])
+                continue
+            if current in self.lemmas:
+                to_process.extend(self.lemmas[current].dependencies)
         
         chain.discard(code)  # Remove the original lemma
-        return sorted(list(chain))
+        result = tuple(sorted(chain))
+        self._chain_cache[code] = result
+        if len(self._chain_cache) > self.CHAIN_CACHE_SIZE:
+            self._chain_cache.popitem(last=False)
+        return list(result)
     
     def get_dependents(self, code: str) -> List[str]:
         """
@@ -243,31 +759,46 @@ class CodedLemmaUtility:
         Returns:
             List of dependent lemma codes
         """
-        dependents = []
+        return sorted(self._dependents.get(code, ()))
+    
+    def _rebuild_dependents(self) -> None:
+        """Rebuild the reverse dependency index."""
+        self._dependents = {}
+        self._chain_cache.clear()
         for lemma_code, lemma_data in self.lemmas.items():
-            if code in lemma_data['dependencies']:
-                dependents.append(lemma_code)
-        return sorted(dependents)
+            for dep in lemma_data.dependencies:
+                self._dependents.setdefault(dep, set()).add(lemma_code)
     
     def list_all(self) -> Dict[str, str]:
         """List all lemma codes and statements."""
-        return {code: lemma['statement'] for code, lemma in self.lemmas.items()}
+        return {code: lemma.statement for code, lemma in self.lemmas.items()}
     
     def list_categories(self) -> Dict[str, int]:
         """List all categories with lemma counts."""
-        categories = {}
-        for lemma in self.lemmas.values():
-            cat = lemma['category']
-            categories[cat] = categories.get(cat, 0) + 1
-        return categories
+        return dict(self._category_counts)
     
     def list_tags(self) -> Dict[str, int]:
         """List all tags with usage counts."""
-        tags = {}
-        for lemma in self.lemmas.values():
-            for tag in lemma['tags']:
-                tags[tag] = tags.get(tag, 0) + 1
-        return tags
+        return dict(self._tag_counts)
+    
+    def _count_lemma(self, lemma: Lemma, delta: int) -> None:
+        """Add delta to the category and tag counts of a lemma."""
+        keys = [(self._category_counts, lemma.category)]
+        keys.extend((self._tag_counts, tag) for tag in lemma.tags)
+        for counts, key in keys:
+            counts[key] += delta
+            if counts[key] <= 0:
+                del counts[key]
+    
+    def _rebuild_counts(self) -> None:
+        """Recount categories, tags and proved lemmas over all lemmas."""
+        self._category_counts = Counter()
+        self._tag_counts = Counter()
+        self._proved = set()
+        for code, lemma in self.lemmas.items():
+            self._count_lemma(lemma, 1)
+            if lemma.proof:
+                self._proved.add(code)
     
     def export_lemma(self, code: str, format: str = 'text') -> Optional[str]:
         """
@@ -292,59 +823,65 @@ class CodedLemmaUtility:
         elif format == 'latex':
             return self._export_latex(code, lemma)
         elif format == 'json':
-            return json.dumps({code: lemma}, indent=2)
+            return _dumps({code: lemma.to_dict()}, indent=True).decode('utf-8')
         else:
             return self._export_text(code, lemma)
     
-    def _export_text(self, code: str, lemma: Dict[str, Any]) -> str:
+    def _export_text(self, code: str, lemma: Lemma) -> str:
         """Export in plain text format."""
-        output = f"Code: {code}\n"
-        output += f"Category: {lemma['category']}\n"
-        output += f"Statement: {lemma['statement']}\n"
-        if lemma['proof']:
-            output += f"Proof: {lemma['proof']}\n"
-        if lemma['tags']:
-            output += f"Tags: {', '.join(lemma['tags'])}\n"
-        if lemma['notes']:
-            output += f"Notes: {lemma['notes']}\n"
-        if lemma['dependencies']:
-            output += f"Depends on: {', '.join(lemma['dependencies'])}\n"
-        output += f"Created: {lemma['created']}\n"
-        output += f"Modified: {lemma['modified']}\n"
-        return output
-    
-    def _export_markdown(self, code: str, lemma: Dict[str, Any]) -> str:
+        buf = io.StringIO()
+        w = buf.write
+        w(f"Code: {code}\n")
+        w(f"Category: {lemma.category}\n")
+        w(f"Statement: {lemma.statement}\n")
+        if lemma.proof:
+            w(f"Proof: {lemma.proof}\n")
+        if lemma.tags:
+            w(f"Tags: {', '.join(lemma.tags)}\n")
+        if lemma.notes:
+            w(f"Notes: {lemma.notes}\n")
+        if lemma.dependencies:
+            w(f"Depends on: {', '.join(lemma.dependencies)}\n")
+        w(f"Created: {lemma.created}\n")
+        w(f"Modified: {lemma.modified}\n")
+        return buf.getvalue()
+    
+    def _export_markdown(self, code: str, lemma: Lemma) -> str:
         """Export in Markdown format."""
-        output = f"## {code}\n\n"
-        output += f"**Category:** {lemma['category']}\n\n"
-        output += f"**Statement:** {lemma['statement']}\n\n"
-        if lemma['proof']:
-            output += f"**Proof:**\n\n{lemma['proof']}\n\n"
-        if lemma['tags']:
-            output += f"**Tags:** {', '.join(f'`{tag}`' for tag in lemma['tags'])}\n\n"
-        if lemma['notes']:
-            output += f"**Notes:** {lemma['notes']}\n\n"
-        if lemma['dependencies']:
-            output += f"**Dependencies:** {', '.join(f'[{dep}](#{dep})' for dep in lemma['dependencies'])}\n\n"
-        output += f"*Created: {lemma['created']}*\n\n"
-        output += f"*Modified: {lemma['modified']}*\n\n"
-        return output
-    
-    def _export_latex(self, code: str, lemma: Dict[str, Any]) -> str:
+        buf = io.StringIO()
+        w = buf.write
+        w(f"## {code}\n\n")
+        w(f"**Category:** {lemma.category}\n\n")
+        w(f"**Statement:** {lemma.statement}\n\n")
+        if lemma.proof:
+            w(f"**Proof:**\n\n{lemma.proof}\n\n")
+        if lemma.tags:
+            w(f"**Tags:** {', '.join(f'`{tag}`' for tag in lemma.tags)}\n\n")
+        if lemma.notes:
+            w(f"**Notes:** {lemma.notes}\n\n")
+        if lemma.dependencies:
+            w(f"**Dependencies:** {', '.join(f'[{dep}](#{dep})' for dep in lemma.dependencies)}\n\n")
+        w(f"*Created: {lemma.created}*\n\n")
+        w(f"*Modified: {lemma.modified}*\n\n")
+        return buf.getvalue()
+    
+    def _export_latex(self, code: str, lemma: Lemma) -> str:
         """Export in LaTeX format."""
-        output = f"\\begin{{lemma}}[{code}]\n"
-        output += f"\\label{{lemma:{code}}}\n"
-        output += f"{lemma['statement']}\n"
-        output += "\\end{lemma}\n\n"
-        if lemma['proof']:
-            output += "\\begin{proof}\n"
-            output += f"{lemma['proof']}\n"
-            output += "\\end{proof}\n\n"
-        if lemma['tags']:
-            output += f"% Tags: {', '.join(lemma['tags'])}\n"
-        if lemma['notes']:
-            output += f"% Notes: {lemma['notes']}\n"
-        return output
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\\begin{{lemma}}[{code}]\n")
+        w(f"\\label{{lemma:{code}}}\n")
+        w(f"{lemma.statement}\n")
+        w("\\end{lemma}\n\n")
+        if lemma.proof:
+            w("\\begin{proof}\n")
+            w(f"{lemma.proof}\n")
+            w("\\end{proof}\n\n")
+        if lemma.tags:
+            w(f"% Tags: {', '.join(lemma.tags)}\n")
+        if lemma.notes:
+            w(f"% Notes: {lemma.notes}\n")
+        return buf.getvalue()
     
     def export_all(self, format: str = 'markdown', filename: Optional[str] = None) -> str:
         """
@@ -358,28 +895,30 @@ class CodedLemmaUtility:
             The exported content
         """
         if format == 'json':
-            content = json.dumps({
+            content = _dumps({
                 'metadata': self.metadata,
-                'lemmas': self.lemmas
-            }, indent=2)
+                'lemmas': self._lemma_dicts()
+            }, indent=True).decode('utf-8')
         else:
-            content = ""
+            parts = []
             if format == 'markdown':
-                content = "# Codified Lemma Collection\n\n"
-                content += f"Generated: {datetime.now().isoformat()}\n\n"
-                content += f"Total Lemmas: {len(self.lemmas)}\n\n"
-                content += "---\n\n"
+                parts.append("# Codified Lemma Collection\n\n")
+                parts.append(f"Generated: {datetime.now().isoformat()}\n\n")
+                parts.append(f"Total Lemmas: {len(self.lemmas)}\n\n")
+                parts.append("---\n\n")
             elif format == 'latex':
-                content = "\\documentclass{article}\n"
-                content += "\\usepackage{amsthm}\n"
-                content += "\\newtheorem{lemma}{Lemma}\n"
-                content += "\\begin{document}\n\n"
+                parts.append("\\documentclass{article}\n")
+                parts.append("\\usepackage{amsthm}\n")
+                parts.append("\\newtheorem{lemma}{Lemma}\n")
+                parts.append("\\begin{document}\n\n")
             
             for code in sorted(self.lemmas.keys()):
-                content += self.export_lemma(code, format) + "\n"
+                parts.append(self.export_lemma(code, format))
+                parts.append("\n")
             
             if format == 'latex':
-                content += "\\end{document}\n"
+                parts.append("\\end{document}\n")
+            content = ''.join(parts)
         
         if filename:
             with open(filename, 'w', encoding='utf-8') as f:
@@ -389,41 +928,192 @@ class CodedLemmaUtility:
     
     def save(self) -> bool:
         """
-        Save lemmas to JSON file.
+        Persist pending changes to the mutation log.
+        
+        The log is compacted into the JSON file once it grows past
+        LOG_COMPACT_THRESHOLD records, or if the JSON file does not exist yet.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if (self._log_records >= self.LOG_COMPACT_THRESHOLD
+                or not os.path.exists(self.data_file)):
+            return self.compact()
+        
+        try:
+            if self._log is not None:
+                self._log.flush()
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"Error saving data: {e}")
+            return False
+    
+    def compact(self) -> bool:
+        """
+        Write all lemmas to the JSON file and truncate the mutation log.
+        
+        The snapshot is written to a temporary file, synced and renamed over
+        the data file, so a crash never leaves a partially written file.
         
         Returns:
             True if successful, False otherwise
         """
+        tmp_file = self.data_file + '.tmp'
         try:
             data = {
                 'metadata': self.metadata,
                 'code_counter': self.code_counter,
-                'lemmas': self.lemmas
+                'lemmas': self._lemma_dicts()
             }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(tmp_file, 'wb', buffering=self.IO_BUFFER_SIZE) as f:
+                f.write(_dumps(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.data_file)
+            
+            # Replaying the log over the new snapshot is harmless, so a
+            # crash before it is removed loses nothing
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            self._log_records = 0
+            self._dirty = False
             return True
         except Exception as e:
             print(f"Error saving data: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
             return False
     
+    def flush(self) -> bool:
+        """
+        Save pending changes, if any.
+        
+        Returns:
+            True if nothing was pending or the save succeeded
+        """
+        if not self._dirty:
+            return True
+        return self.save()
+    
+    def close(self) -> None:
+        """Compact pending changes into the JSON file and close the log."""
+        if self._dirty or self._log_records:
+            self.compact()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+    
+    def _lemma_dicts(self) -> Dict[str, Dict[str, Any]]:
+        """Return all lemmas as plain dictionaries for serialization."""
+        return {code: lemma.to_dict() for code, lemma in self.lemmas.items()}
+    
+    def _mark_dirty(self) -> None:
+        """Record a mutation and save unless saving is deferred."""
+        self._dirty = True
+        if self._autosave:
+            self.save()
+    
+    def _append_log(self, record: Dict[str, Any]) -> None:
+        """Append one mutation record to the log buffer."""
+        if self._log is None:
+            self._log = open(self.log_file, 'ab', buffering=1 << 16)
+        self._log.write(_dumps(record) + b'\n')
+        self._log_records += 1
+    
+    def _replay(self, record: Dict[str, Any]) -> None:
+        """Apply one mutation record from the log."""
+        op = record['op']
+        code = record['code']
+        lemma = self.lemmas.get(code)
+        
+        if op == 'add':
+            self.lemmas[code] = Lemma.from_dict(record['lemma'])
+            self.code_counter = max(self.code_counter, record['code_counter'])
+        elif op == 'update' and lemma is not None:
+            for field, value in record['fields'].items():
+                setattr(lemma, field, value)
+            lemma._lc_text = None
+        elif op == 'delete':
+            self.lemmas.pop(code, None)
+            for lemma_data in self.lemmas.values():
+                lemma_data.dependencies.pop(code, None)
+        elif op == 'add_dependency' and lemma is not None:
+            lemma.dependencies[record['depends_on']] = None
+            lemma.modified = record['modified']
+        elif op == 'remove_dependency' and lemma is not None:
+            lemma.dependencies.pop(record['depends_on'], None)
+        
+        if 'last_modified' in record:
+            self.metadata['last_modified'] = record['last_modified']
+    
     def load(self) -> bool:
         """
-        Load lemmas from JSON file.
+        Load lemmas from the JSON file and replay the mutation log.
         
         Returns:
             True if successful, False otherwise
         """
-        if not os.path.exists(self.data_file):
+        if not os.path.exists(self.data_file) and not os.path.exists(self.log_file):
             return False
         
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'rb',
+                          buffering=self.IO_BUFFER_SIZE) as f:
+                    if (ijson is not None and os.path.getsize(self.data_file)
+                            >= self.STREAM_LOAD_THRESHOLD):
+                        # Read the small top-level fields first, then build
+                        # the lemmas one at a time so the parsed file is
+                        # never held alongside them
+                        for key in ('metadata', 'code_counter'):
+                            f.seek(0)
+                            for value in ijson.items(f, key, use_float=True):
+                                setattr(self, key, value)
+                                break
+                        f.seek(0)
+                        self.lemmas = {
+                            code: Lemma.from_dict(fields)
+                            for code, fields in ijson.kvitems(
+                                f, 'lemmas', use_float=True,
+                                buf_size=self.IO_BUFFER_SIZE)}
+                    else:
+                        data = _loads(f.read())
+                        self.metadata = data.get('metadata', self.metadata)
+                        self.code_counter = data.get('code_counter',
+                                                     self.code_counter)
+                        self.lemmas = {code: Lemma.from_dict(fields)
+                                       for code, fields
+                                       in data.get('lemmas', {}).items()}
+            
+            self._log_records = 0
+            if os.path.exists(self.log_file):
+                if self._log is not None:
+                    self._log.flush()
+                good = 0
+                with open(self.log_file, 'rb',
+                          buffering=self.IO_BUFFER_SIZE) as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break
+                        try:
+                            record = _loads(line)
+                        except ValueError:
+                            break
+                        self._replay(record)
+                        self._log_records += 1
+                        good += len(line)
+                if good < os.path.getsize(self.log_file):
+                    # Torn write at the end of the log; cut it off so that
+                    # later appends are not stranded behind the fragment
+                    os.truncate(self.log_file, good)
             
-            self.metadata = data.get('metadata', self.metadata)
-            self.code_counter = data.get('code_counter', self.code_counter)
-            self.lemmas = data.get('lemmas', {})
+            self._rebuild_dependents()
+            self._rebuild_counts()
+            self._rebuild_index()
             return True
         except Exception as e:
             print(f"Error loading data: {e}")
@@ -440,22 +1130,41 @@ class CodedLemmaUtility:
             True if successful, False otherwise
         """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filename, 'rb', buffering=self.IO_BUFFER_SIZE) as f:
+                data = _loads(f.read())
             
-            imported_lemmas = data.get('lemmas', {})
-            for code, lemma in imported_lemmas.items():
-                if code not in self.lemmas:
-                    self.lemmas[code] = lemma
-                    # Update counter if needed
-                    try:
-                        code_num = int(code[1:])
-                        if code_num >= self.code_counter:
-                            self.code_counter = code_num + 1
-                    except ValueError:
-                        pass
+            # Build every lemma first so a bad record cannot leave the
+            # import half applied; existing codes are kept as they are
+            imported = {code: Lemma.from_dict(fields) for code, fields
+                        in data.get('lemmas', {}).items()
+                        if code not in self.lemmas}
+            added = []
+            code_nums = []
+            for code, lemma in imported.items():
+                self.lemmas[code] = lemma
+                added.append(code)
+                self._position[code] = next(self._positions)
+                self._index_lemma(code, lemma, 1)
+                self._count_lemma(lemma, 1)
+                if lemma.proof:
+                    self._proved.add(code)
+                if code.startswith('L') and code[1:].isdecimal():
+                    code_nums.append(int(code[1:]))
             
-            self.save()
+            # Update counter if needed
+            if code_nums:
+                self.code_counter = max(self.code_counter, max(code_nums) + 1)
+            
+            for code in added:
+                self._append_log({
+                    'op': 'add',
+                    'code': code,
+                    'lemma': self.lemmas[code].to_dict(),
+                    'code_counter': self.code_counter
+                })
+            
+            self._rebuild_dependents()
+            self._mark_dirty()
             return True
         except Exception as e:
             print(f"Error importing data: {e}")
@@ -464,8 +1173,8 @@ class CodedLemmaUtility:
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about the lemma collection."""
         total_lemmas = len(self.lemmas)
-        with_proof = sum(1 for l in self.lemmas.values() if l['proof'])
-        with_dependencies = sum(1 for l in self.lemmas.values() if l['dependencies'])
+        with_proof = len(self._proved)
+        with_dependencies = sum(1 for l in self.lemmas.values() if l.dependencies)
         
         return {
             'total_lemmas': total_lemmas,
@@ -553,6 +1262,8 @@ def main():
     results = clu.search(query="induction")
     for code in results:
         print(f"  {code}: {results[code]['statement']}")
+    
+    clu.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,362 @@
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import clu
+from clu import CodedLemmaUtility
+
+
+class CLUTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.data_file = os.path.join(self.tmp, 'lemmas.json')
+
+    def open_clu(self) -> CodedLemmaUtility:
+        clu = CodedLemmaUtility(self.data_file)
+        self.addCleanup(clu.close)
+        return clu
+
+
+class TestLog(CLUTestCase):
+    def test_torn_tail_is_truncated(self):
+        clu = CodedLemmaUtility(self.data_file)
+        first = clu.add_lemma("First")
+        clu.close()
+
+        clu = CodedLemmaUtility(self.data_file)
+        second = clu.add_lemma("Second")
+        clu.flush()
+        clu._log.close()
+        clu._log = None
+        with open(clu.log_file, 'ab') as f:
+            f.write(b'{"op":"add","code":"L9')
+
+        clu = CodedLemmaUtility(self.data_file)
+        third = clu.add_lemma("Third")
+        clu.flush()
+        clu._log.close()
+        clu._log = None
+
+        clu = self.open_clu()
+        self.assertEqual(list(clu.lemmas), [first, second, third])
+        self.assertEqual(clu.get_lemma(third)['statement'], "Third")
+
+
+class TestBatching(CLUTestCase):
+    def test_nested_blocks_save_when_outermost_exits(self):
+        clu = self.open_clu()
+        with clu:
+            with clu:
+                clu.add_lemma("Inner")
+            clu.add_lemma("Outer")
+            self.assertTrue(clu._dirty)
+        self.assertFalse(clu._dirty)
+        clu.add_lemma("After")
+        self.assertFalse(clu._dirty)
+
+    def test_bulk_add_flushes_when_an_entry_fails(self):
+        clu = CodedLemmaUtility(self.data_file)
+        clu.add_lemma("Existing")
+        clu.close()
+
+        clu = self.open_clu()
+        with self.assertRaises(TypeError):
+            clu.bulk_add([{'statement': "Added"}, {'bogus': 1}])
+        self.assertFalse(clu._dirty)
+        reader = CodedLemmaUtility(self.data_file)
+        self.assertEqual(list(reader.list_all().values()),
+                         ["Existing", "Added"])
+
+
+class TestDerivedState(CLUTestCase):
+    """Check the reverse dependency map, chain cache, counts and proved set
+    against scans of clu.lemmas, as the baseline computed them."""
+
+    def assert_matches_scan(self, clu):
+        lemmas = clu.lemmas
+        for code in lemmas:
+            self.assertEqual(clu.get_dependents(code), sorted(
+                other for other, lemma in lemmas.items()
+                if code in lemma.dependencies))
+            chain, pending = set(), [code]
+            while pending:
+                current = pending.pop()
+                if current not in chain:
+                    chain.add(current)
+                    pending.extend(lemmas[current].dependencies)
+            chain.discard(code)
+            self.assertEqual(clu.get_dependency_chain(code), sorted(chain))
+        self.assertLessEqual(len(clu._chain_cache), clu.CHAIN_CACHE_SIZE)
+
+        self.assertEqual(clu.list_categories(), dict(Counter(
+            lemma.category for lemma in lemmas.values())))
+        self.assertEqual(clu.list_tags(), dict(Counter(
+            tag for lemma in lemmas.values() for tag in lemma.tags)))
+        proved = [code for code, lemma in lemmas.items() if lemma.proof]
+        self.assertEqual(list(clu.search(has_proof=True)), proved)
+        self.assertEqual(clu.get_statistics()['with_proof'], len(proved))
+
+    def test_dependents_and_chains_follow_edits(self):
+        clu = self.open_clu()
+        a = clu.add_lemma("A")
+        b = clu.add_lemma("B")
+        c = clu.add_lemma("C")
+        clu.add_dependency(c, b)
+        clu.add_dependency(b, a)
+        self.assertEqual(clu.get_dependency_chain(c), [a, b])
+
+        # A cached chain must see edits further down
+        d = clu.add_lemma("D")
+        clu.add_dependency(a, d)
+        self.assertEqual(clu.get_dependency_chain(c), [a, b, d])
+        clu.add_dependency(d, c)
+        self.assertEqual(clu.get_dependency_chain(c), [a, b, d])
+        clu.remove_dependency(b, a)
+        self.assertEqual(clu.get_dependency_chain(c), [b])
+        self.assertEqual(clu.get_dependents(c), [d])
+
+        clu.delete_lemma(b)
+        self.assertEqual(clu.get_dependency_chain(c), [])
+        self.assertEqual(clu.get_dependents(b), [])
+        self.assertEqual(clu.get_lemma(c)['dependencies'], [])
+        self.assert_matches_scan(clu)
+
+    def test_random_edits_match_scans(self):
+        rnd = random.Random(1)
+        with mock.patch.object(CodedLemmaUtility, 'CHAIN_CACHE_SIZE', 4):
+            clu = self.open_clu()
+            codes = []
+            for step in range(400):
+                action = rnd.random()
+                if action < 0.3 or len(codes) < 2:
+                    codes.append(clu.add_lemma(
+                        f"S{step}", proof=rnd.choice(["", "p"]),
+                        tags=rnd.sample("abc", rnd.randint(0, 2)),
+                        category=rnd.choice(["x", "y", None])))
+                elif action < 0.55:
+                    clu.add_dependency(*rnd.sample(codes, 2))
+                elif action < 0.65:
+                    clu.remove_dependency(*rnd.sample(codes, 2))
+                elif action < 0.85:
+                    clu.update_lemma(rnd.choice(codes),
+                                     proof=rnd.choice(["", "q"]),
+                                     tags=rnd.sample("abc", rnd.randint(0, 2)),
+                                     category=rnd.choice(["x", "z"]))
+                else:
+                    code = rnd.choice(codes)
+                    clu.delete_lemma(code)
+                    codes.remove(code)
+                if step % 20 == 0:
+                    self.assert_matches_scan(clu)
+            self.assert_matches_scan(clu)
+            clu.close()
+            self.assert_matches_scan(self.open_clu())
+
+
+class TestSnapshot(CLUTestCase):
+    def test_one_shot_script_leaves_complete_data_file(self):
+        # The add-then-read-the-file flow from CONFIG.md, without close()
+        clu = CodedLemmaUtility(self.data_file)
+        clu.add_lemma("First lemma")
+        clu.close()
+        subprocess.run(
+            [sys.executable, '-c',
+             'import sys; from clu import CodedLemmaUtility; '
+             'clu = CodedLemmaUtility(sys.argv[1]); clu.add_lemma("New lemma")',
+             self.data_file],
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+        with open(self.data_file) as f:
+            data = json.load(f)
+        self.assertEqual([lemma['statement'] for lemma
+                          in data['lemmas'].values()],
+                         ["First lemma", "New lemma"])
+        self.assertFalse(os.path.exists(self.data_file + '.log'))
+
+
+class TestSearch(CLUTestCase):
+    def test_index_follows_mutations(self):
+        clu = self.open_clu()
+        a = clu.add_lemma("Cauchy-Schwarz inequality", tags=["analysis"])
+        b = clu.add_lemma("Triangle inequality", proof="Square both sides")
+        c = clu.add_lemma("Pigeonhole principle", category="combinatorics")
+        self.assertEqual(list(clu.search(query="inequality")), [a, b])
+        self.assertEqual(list(clu.search(query="ineq")), [a, b])
+        self.assertEqual(list(clu.search(query="schwarz ineq")), [a])
+
+        clu.update_lemma(a, statement="Hölder inequality", tags=["norms"])
+        self.assertEqual(list(clu.search(query="schwarz")), [])
+        self.assertEqual(list(clu.search(query="HÖLDER")), [a])
+        self.assertEqual(list(clu.search(query="inequality")), [a, b])
+        self.assertEqual(list(clu.search(tags=["analysis"])), [])
+        self.assertEqual(list(clu.search(tags=["norms"])), [a])
+
+        clu.delete_lemma(b)
+        self.assertEqual(list(clu.search(query="inequality")), [a])
+        self.assertEqual(list(clu.search(has_proof=True)), [])
+        self.assertEqual(list(clu.search(category="combinatorics",
+                                         query="hole")), [c])
+
+
+class TestUpdate(CLUTestCase):
+    def test_none_tags_clear_the_tags(self):
+        clu = self.open_clu()
+        code = clu.add_lemma("Tagged", tags=["a"], category="c")
+        self.assertTrue(clu.update_lemma(code, tags=None))
+        self.assertEqual(clu.get_lemma(code)['tags'], [])
+        self.assertEqual(clu.list_tags(), {})
+        self.assertEqual(clu.list_categories(), {"c": 1})
+        self.assertEqual(list(clu.search(category="c")), [code])
+
+    def test_bad_value_leaves_lemma_untouched(self):
+        clu = self.open_clu()
+        code = clu.add_lemma("Tagged", tags=["a"], category="c")
+        before = clu.get_lemma(code)
+        for fields in ({'tags': 5}, {'tags': [["a"]]}, {'category': ["c"]},
+                       {'statement': "Changed", 'tags': 5}):
+            self.assertFalse(clu.update_lemma(code, **fields), fields)
+        self.assertEqual(clu.get_lemma(code), before)
+        self.assertEqual(clu.list_tags(), {"a": 1})
+        self.assertEqual(clu.list_categories(), {"c": 1})
+        self.assertEqual(list(clu.search(tags=["a"], query="tagged")), [code])
+
+
+class TestRegex(CLUTestCase):
+    def test_shorthand_classes_match_unicode(self):
+        clu = self.open_clu()
+        greek = clu.add_lemma("Sum over αβγ is ٣")
+        clu.add_lemma("Nothing to see")
+        for pattern in (r"\bαβγ\b", r"\w+\s+is", r"is \d", r"\D+٣"):
+            self.assertEqual(list(clu.search(query=pattern, regex=True)),
+                             [greek], pattern)
+
+    def test_translation_keeps_re_matches(self):
+        texts = ["Sum over αβγ is ٣\n", "a\u2003b", "x_1", "", "aaa!"]
+        for pattern in (r"\w+\s+is", r"\d$", r"\W\S", r"[\d\s]", r"\D+٣",
+                        r"(a+)+$", r"x|\d\Z", r"a{,2}!", r"[]x]$"):
+            translated = clu._re2_translate(pattern)
+            self.assertIsNotNone(translated, pattern)
+            if clu.re2 is None:
+                continue
+            options = clu.re2.Options()
+            options.case_sensitive = False
+            compiled = clu.re2.compile(translated, options)
+            for text in texts:
+                self.assertEqual(
+                    bool(compiled.search(text)),
+                    bool(re.search(pattern, text, re.IGNORECASE)),
+                    (pattern, text))
+
+    def test_untranslatable_patterns(self):
+        for pattern in (r"\bx", r"(?=a)", r"(?m)a$", r"(a$)b", r"[\w-]",
+                        r"[[:alpha:]]"):
+            self.assertIsNone(clu._re2_translate(pattern), pattern)
+
+    @unittest.skipIf(clu.re2 is None, "google-re2 not installed")
+    def test_re2_guards_backtracking_patterns(self):
+        self.assertNotIsInstance(clu._compile_query(r"(a+)+$"), re.Pattern)
+        self.assertNotIsInstance(clu._compile_query(r"(\w+)+\d"), re.Pattern)
+        self.assertIsInstance(clu._compile_query(r"\bsum\b"), re.Pattern)
+
+
+class TestPublicAPI(CLUTestCase):
+    def test_returned_lemmas_are_json_serializable_copies(self):
+        clu = self.open_clu()
+        base = clu.add_lemma("Base")
+        code = clu.add_lemma("Top", tags=["t"])
+        clu.add_dependency(code, base)
+
+        lemma = clu.get_lemma(code)
+        self.assertEqual(json.loads(json.dumps(lemma))['dependencies'], [base])
+        json.dumps(clu.search(query="top"))
+        json.dumps(clu.search_by_tag("t"))
+
+        lemma['tags'].append("u")
+        clu.search(tags=["t"])[code]['statement'] = "Changed"
+        self.assertEqual(clu.get_lemma(code)['tags'], ["t"])
+        self.assertEqual(clu.get_lemma(code)['statement'], "Top")
+        self.assertEqual(clu.list_tags(), {"t": 1})
+
+    def test_caller_tag_lists_are_copied(self):
+        clu = self.open_clu()
+        tags = ["x"]
+        code = clu.add_lemma("Copied", tags=tags)
+        tags.append("y")
+        self.assertEqual(clu.get_lemma(code)['tags'], ["x"])
+        self.assertEqual(list(clu.search(tags=["x"])), [code])
+
+        new_tags = ["z"]
+        clu.update_lemma(code, tags=new_tags)
+        new_tags.append("w")
+        self.assertEqual(clu.get_lemma(code)['tags'], ["z"])
+        self.assertEqual(clu.search(tags=["w"]), {})
+        self.assertEqual(clu.list_tags(), {"z": 1})
+
+    def test_stored_lemmas_are_read_only(self):
+        clu = self.open_clu()
+        code = clu.add_lemma("Read only")
+        with self.assertRaises(TypeError):
+            clu.lemmas[code]['proof'] = "Sneaky"
+        self.assertEqual(clu.search(has_proof=True), {})
+
+
+class TestImport(CLUTestCase):
+    def write_json(self, name, lemmas):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w') as f:
+            json.dump({'lemmas': lemmas}, f)
+        return path
+
+    def test_import_without_statement(self):
+        clu = self.open_clu()
+        path = self.write_json('in.json', {
+            'L5000': {'proof': "No statement"},
+            'L5001': {'statement': "Fine"},
+        })
+        self.assertTrue(clu.import_from_json(path))
+        self.assertEqual(clu.get_lemma('L5000')['statement'], '')
+        self.assertEqual(list(clu.search(query="fine")), ['L5001'])
+
+    def test_bad_record_leaves_collection_untouched(self):
+        clu = self.open_clu()
+        code = clu.add_lemma("Existing")
+        path = self.write_json('in.json', {
+            'L5000': {'statement': "Good"},
+            'L5001': {'statement': "Bad", 'dependencies': 7},
+        })
+        self.assertFalse(clu.import_from_json(path))
+        self.assertEqual(list(clu.lemmas), [code])
+        self.assertEqual(clu.search(query="good"), {})
+        self.assertEqual(clu.code_counter, 1001)
+
+
+class TestLoad(CLUTestCase):
+    @unittest.skipIf(clu.ijson is None, "ijson not installed")
+    def test_streaming_load_matches_plain_load(self):
+        with CodedLemmaUtility(self.data_file) as store:
+            store.metadata['ratio'] = 0.5
+            code = store.add_lemma("Streamed", proof="p", tags=["t"])
+            store.add_dependency(code, store.add_lemma("Base"))
+
+        plain = self.open_clu()
+        with mock.patch.object(CodedLemmaUtility, 'STREAM_LOAD_THRESHOLD', 0):
+            streamed = self.open_clu()
+
+        self.assertEqual(streamed.metadata, plain.metadata)
+        self.assertIsInstance(streamed.metadata['ratio'], float)
+        self.assertEqual(streamed.code_counter, plain.code_counter)
+        self.assertEqual(streamed.export_all('json'), plain.export_all('json'))
+        streamed.compact()
+
+
+if __name__ == '__main__':
+    unittest.main()